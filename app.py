@@ -2,7 +2,6 @@
 
 import os
 import time
-import random
 
 import pandas as pd
 import streamlit as st
@@ -13,6 +12,9 @@ from core import  (
     build_question_bank,
     load_questions_from_json_bytes,
 )
+from leaderboard import Leaderboard
+from prefetch import QuestionPrefetcher
+from sketches import ResponseTimeSketches, SketchStore
 
 # ==========================================================
 # Streamlit Page Setup
@@ -91,50 +93,79 @@ def apply_theme():
     </style>
     """, unsafe_allow_html=True)
 
+# ==========================================================
+# Helper: User ID + Shared Leaderboard
+# ==========================================================
+def current_user_id():
+    """Email if given, otherwise the learner name with underscores."""
+    return st.session_state.email or st.session_state.learner.name.replace(" ", "_")
+
+
+@st.cache_resource
+def get_leaderboard():
+    """One Leaderboard shared by every browser session in this server."""
+    return Leaderboard("data/leaderboard.db")
+
+
+@st.cache_resource
+def get_sketch_store():
+    """Response-time sketches merged across all saved sessions."""
+    return SketchStore("data/response_times.json")
+
+
 # ==========================================================
 # Helper: Save Session to CSV
 # ==========================================================
 def save_user_session_to_disk():
-    """Save current session log as CSV in data/user_logs/."""
+    """Save current session log as CSV in data/user_logs/.
+
+    The file name carries the session start time, so a new session never
+    overwrites an earlier one. compact_user_logs() in src/log_archive.py
+    later merges these files into data/archive/.
+    """
     if not st.session_state.log:
         return None
 
     df = pd.DataFrame(st.session_state.log)
     os.makedirs("data/user_logs", exist_ok=True)
 
-    user_id = st.session_state.email or st.session_state.learner.name.replace(" ", "_")
-    filename = f"data/user_logs/{user_id}_session.csv"
-    df.to_csv(filename, index=False)
+    user_id = current_user_id()
+    started = st.session_state.session_started or time.strftime("%Y%m%d-%H%M%S")
+    filename = f"data/user_logs/{user_id}_{started}_session.csv"
+    # Write then rename, so compaction never reads a half-written file.
+    tmp = f"{filename}.tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, filename)
+
+    # Fold this session's response times into the all-players sketches
+    # (only what was added since the last save, so saving twice is safe).
+    get_sketch_store().merge(unsaved_response_times())
+    st.session_state.times_saved = len(st.session_state.log)
     return filename
 
 
+def unsaved_response_times():
+    """Sketches for the answers logged since the last save."""
+    pending = ResponseTimeSketches()
+    for row in st.session_state.log[st.session_state.times_saved:]:
+        pending.add(
+            row["subject"], row["qtype"], row["difficulty"], row["response_time"]
+        )
+    return pending
+
+
 # ==========================================================
 # Question Selection (simple adaptive logic)
 # ==========================================================
 def choose_next_question(questions, difficulty_choice, last_correct, last_question):
-    """Pick the next question with simple difficulty adaptation + no repeats."""
-    if not questions:
-        return None
-
-    # Pick difficulty
-    if difficulty_choice == "mixed":
-        if last_correct is True:
-            preferred = ["medium", "hard"]
-        elif last_correct is False:
-            preferred = ["easy"]
-        else:
-            preferred = ["easy", "medium"]
-        candidates = [q for q in questions if q.difficulty in preferred] or questions
-    else:
-        candidates = [q for q in questions if q.difficulty == difficulty_choice] or questions
-
-    # Avoid repeating exact same prompt back-to-back
-    if last_question is not None:
-        non_repeat = [q for q in candidates if q.prompt != last_question.prompt]
-        if non_repeat:
-            candidates = non_repeat
+    """Pick the next question with simple difficulty adaptation + no repeats.
 
-    return random.choice(candidates)
+    Candidates come from this session's prefetch buffer (src/prefetch.py),
+    which is refilled after the page renders rather than inside Submit.
+    """
+    return st.session_state.prefetcher.next(
+        questions, difficulty_choice, last_correct, last_question
+    )
 
 
 # ==========================================================
@@ -152,6 +183,9 @@ _defaults = {
     "phase": "style_quiz",  # or "study"
     "learning_style": None,
     "question_start_time": None,
+    "session_started": None,
+    "times_saved": 0,  # log rows already merged into the sketch store
+    "prefetcher": QuestionPrefetcher(),
     "page": "Study Mode",
 }
 
@@ -207,6 +241,9 @@ if st.sidebar.button("Start Session 🚀"):
         st.session_state.phase = "style_quiz"
         st.session_state.learning_style = None
         st.session_state.question_start_time = None
+        st.session_state.session_started = time.strftime("%Y%m%d-%H%M%S")
+        st.session_state.times_saved = 0
+        st.session_state.prefetcher = QuestionPrefetcher()
 
         # Built-in questions
         st.session_state.questions.extend(build_question_bank())
@@ -226,6 +263,22 @@ if st.sidebar.button("Start Session 🚀"):
 # ==========================================================
 # Learning Style Quiz
 # ==========================================================
+STYLE_QUIZ_STATEMENTS = (
+    "I remember diagrams, charts, and formulas easily.",
+    "I like working through step-by-step math or logic problems.",
+    "I learn best by typing commands or doing hands-on labs (like Linux).",
+    "Multiple-choice questions feel natural and low-stress to me.",
+    "I enjoy debugging or solving open-ended technical problems.",
+    "Security or networking labs sound interesting to me.",
+)
+
+STYLE_LABELS = {
+    "visual": "Visual-choice learner (MCQ / diagrams)",
+    "analytical": "Analytical learner (math / problem solving)",
+    "practical": "Hands-on learner (Linux / labs / security)",
+}
+
+
 def render_learning_style_quiz():
     st.subheader("Step 1: Learning Style Quiz")
 
@@ -236,48 +289,16 @@ def render_learning_style_quiz():
 
     scale = [1, 2, 3, 4, 5]
 
-    q1 = st.radio(
-        "I remember diagrams, charts, and formulas easily.",
-        scale,
-        index=2,
-        horizontal=True,
-        key="lsq1",
-    )
-    q2 = st.radio(
-        "I like working through step-by-step math or logic problems.",
-        scale,
-        index=2,
-        horizontal=True,
-        key="lsq2",
-    )
-    q3 = st.radio(
-        "I learn best by typing commands or doing hands-on labs (like Linux).",
-        scale,
-        index=2,
-        horizontal=True,
-        key="lsq3",
-    )
-    q4 = st.radio(
-        "Multiple-choice questions feel natural and low-stress to me.",
-        scale,
-        index=2,
-        horizontal=True,
-        key="lsq4",
-    )
-    q5 = st.radio(
-        "I enjoy debugging or solving open-ended technical problems.",
-        scale,
-        index=2,
-        horizontal=True,
-        key="lsq5",
-    )
-    q6 = st.radio(
-        "Security or networking labs sound interesting to me.",
-        scale,
-        index=2,
-        horizontal=True,
-        key="lsq6",
-    )
+    q1, q2, q3, q4, q5, q6 = [
+        st.radio(
+            statement,
+            scale,
+            index=2,
+            horizontal=True,
+            key=f"lsq{i}",
+        )
+        for i, statement in enumerate(STYLE_QUIZ_STATEMENTS, start=1)
+    ]
 
     if st.button("Finish Learning Style Quiz"):
         visual_score = q1 + q4
@@ -293,13 +314,8 @@ def render_learning_style_quiz():
         st.session_state.learning_style = style
         st.session_state.phase = "study"
 
-        style_map = {
-            "visual": "Visual-choice learner (MCQ / diagrams)",
-            "analytical": "Analytical learner (math / problem solving)",
-            "practical": "Hands-on learner (Linux / labs / security)",
-        }
         st.success(
-            f"Your inferred learning style is: **{style_map.get(style, style)}**.\n\n"
+            f"Your inferred learning style is: **{STYLE_LABELS.get(style, style)}**.\n\n"
             "Scroll down to begin the adaptive study session."
         )
 
@@ -375,7 +391,7 @@ if st.session_state.page == "Study Mode":
                     last_correct=st.session_state.last_correct,
                     last_question=None,
                 )
-                st.session_state.question_start_time = time.time()
+                st.session_state.question_start_time = time.perf_counter()
 
             q = st.session_state.current_question
 
@@ -409,9 +425,10 @@ if st.session_state.page == "Study Mode":
                         st.warning("Please enter an answer before submitting.")
                     else:
                         start_t = (
-                            st.session_state.question_start_time or time.time()
+                            st.session_state.question_start_time
+                            or time.perf_counter()
                         )
-                        elapsed = time.time() - start_t
+                        elapsed = time.perf_counter() - start_t
 
                         correct = (
                             str(user_answer).strip().lower()
@@ -420,7 +437,7 @@ if st.session_state.page == "Study Mode":
 
                         # Update learner stats
                         st.session_state.learner.update(
-                            q.subject, q.qtype, correct, elapsed
+                            q.subject, q.qtype, correct, elapsed, q.difficulty
                         )
                         st.session_state.last_correct = correct
 
@@ -435,12 +452,19 @@ if st.session_state.page == "Study Mode":
                                 "correct": correct,
                                 "response_time": elapsed,
                                 "learning_style_quiz": st.session_state.learning_style,
+                                "timestamp": time.time(),
                             }
                         )
 
                         # Score + feedback
+                        points = 10 if correct else 0
+                        get_leaderboard().record(
+                            current_user_id(),
+                            st.session_state.learner.name,
+                            points,
+                        )
                         if correct:
-                            st.session_state.score += 10
+                            st.session_state.score += points
                             st.session_state.last_result = "✅ Correct! Great job!"
                             st.balloons()
                         else:
@@ -455,7 +479,7 @@ if st.session_state.page == "Study Mode":
                             last_correct=st.session_state.last_correct,
                             last_question=q,
                         )
-                        st.session_state.question_start_time = time.time()
+                        st.session_state.question_start_time = time.perf_counter()
 
             with col2:
                 if st.button("Skip / Next Question"):
@@ -466,7 +490,7 @@ if st.session_state.page == "Study Mode":
                         last_question=st.session_state.current_question,
                     )
                     st.session_state.last_result = ""
-                    st.session_state.question_start_time = time.time()
+                    st.session_state.question_start_time = time.perf_counter()
 
             # Score + summary
             st.markdown(f"**Score:** {st.session_state.score}")
@@ -497,6 +521,12 @@ if st.session_state.page == "Study Mode":
             st.markdown("---")
             render_custom_question_builder()
 
+            # Get the next picks ready for either outcome while the
+            # student is still reading this question.
+            st.session_state.prefetcher.prefetch(
+                st.session_state.questions, difficulty
+            )
+
 
 # ==========================================================
 # PAGE: ANALYTICS
@@ -533,6 +563,53 @@ if st.session_state.page == "Analytics":
         st.bar_chart(acc_by_qtype)
         st.markdown("</div>", unsafe_allow_html=True)
 
+        st.markdown('<div class="analytics-card">', unsafe_allow_html=True)
+        st.subheader("Response Time (this session)")
+        st.dataframe(
+            pd.DataFrame(
+                st.session_state.learner.response_times.summary()
+            ).round(2),
+            use_container_width=True,
+            hide_index=True,
+        )
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    # ----- Response-time percentiles across all users -----
+    st.subheader("⏱️ Response Time Percentiles (all players, seconds)")
+    all_times = get_sketch_store().load()
+    if st.session_state.log:
+        all_times.merge(unsaved_response_times())
+    time_rows = all_times.summary()
+    if not time_rows:
+        st.info("No response times recorded yet.")
+    else:
+        st.dataframe(
+            pd.DataFrame(time_rows).round(2),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    # ----- Shared leaderboard (all users, all sessions) -----
+    st.subheader("🏆 Leaderboard")
+    board = get_leaderboard()
+    top_rows = board.top(10)
+    if not top_rows:
+        st.info("No scores on the leaderboard yet.")
+    else:
+        st.dataframe(
+            pd.DataFrame(top_rows)[["rank", "name", "score", "answered"]],
+            use_container_width=True,
+            hide_index=True,
+        )
+        if st.session_state.learner:
+            my_rank = board.rank(current_user_id())
+            if my_rank:
+                rank, total = my_rank
+                st.write(
+                    f"**Your rank:** #{rank} of {board.size()} "
+                    f"with {total} points"
+                )
+
 
 # ==========================================================
 # End Session Button
@@ -32,6 +32,7 @@ pandas
 scikit-learn
 matplotlib
 numpy
+pyarrow
 EOF
 
 echo "✨ Setup complete! You're ready to deploy."
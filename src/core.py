@@ -4,6 +4,8 @@ import json
 import random
 from collections import defaultdict
 
+from sketches import ResponseTimeSketches
+
 
 # =====================================================
 # Question Class
@@ -36,8 +38,10 @@ class Learner:
         self.email = email
         # (subject, qtype) -> {correct, total, time}
         self.stats = defaultdict(lambda: {"correct": 0, "total": 0, "time": 0.0})
+        # (subject, qtype, difficulty) -> response-time quantile sketch
+        self.response_times = ResponseTimeSketches()
 
-    def update(self, subject, qtype, correct, elapsed):
+    def update(self, subject, qtype, correct, elapsed, difficulty):
         """Update basic performance stats for this learner."""
         key = (subject, qtype)
         s = self.stats[key]
@@ -45,6 +49,7 @@ class Learner:
         s["time"] += elapsed
         if correct:
             s["correct"] += 1
+        self.response_times.add(subject, qtype, difficulty, elapsed)
 
     def accuracy(self, subject, qtype):
         s = self.stats[(subject, qtype)]
@@ -0,0 +1,292 @@
+# src/leaderboard.py
+
+import os
+import sqlite3
+import threading
+import time
+
+
+# =====================================================
+# Leaderboard – shared across all Streamlit sessions
+# =====================================================
+class Leaderboard:
+    """
+    Cross-user leaderboard stored in a local SQLite file.
+
+    scores:        one row per user, indexed on (score DESC, updated)
+                   so top-k reads walk the index instead of the table.
+    score_counts:  how many users sit at each score. A user's rank is
+                   1 + the number of users in higher buckets, so it
+                   never touches the per-user rows.
+
+    Users with the same score share a rank (1, 1, 3, ...); `updated` only
+    orders tied rows in the top-k table and changes when the score does.
+
+    Every update is a handful of B-tree lookups (O(log n)) inside one
+    write transaction, so many sessions can submit at the same time.
+    A rank lookup reads one score_counts row per distinct score above
+    the user: independent of how many users there are, but it grows with
+    the spread of scores (worst case for the lowest-ranked users).
+    """
+
+    def __init__(self, path="data/leaderboard.db", timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        # Sessions in this process queue here instead of spinning on
+        # SQLite's busy handler; other processes still use the file lock.
+        self._write_lock = threading.Lock()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._create_tables()
+
+    # ---------- connection handling ----------
+    def _conn(self):
+        """One connection per thread (Streamlit runs each session in a thread)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            self._local.conn = conn
+        return conn
+
+    def _create_tables(self):
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS scores (
+                user_id  TEXT PRIMARY KEY,
+                name     TEXT NOT NULL,
+                score    INTEGER NOT NULL DEFAULT 0,
+                answered INTEGER NOT NULL DEFAULT 0,
+                updated  REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_scores_rank
+                ON scores (score DESC, updated ASC);
+            CREATE TABLE IF NOT EXISTS score_counts (
+                score INTEGER PRIMARY KEY,
+                n     INTEGER NOT NULL
+            );
+        """)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ---------- writes ----------
+    def record(self, user_id, name, points):
+        """Add `points` for one scored answer and return the new total."""
+        conn = self._conn()
+        now = time.time()
+        with self._write_lock:
+            return self._record(conn, user_id, name, points, now)
+
+    def _record(self, conn, user_id, name, points, now):
+        # BEGIN IMMEDIATE takes the write lock up front so two sessions
+        # never read the same old score and both write over it.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT score FROM scores WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            old = row[0] if row else None
+            new = (old or 0) + points
+
+            if old is None:
+                conn.execute(
+                    "INSERT INTO scores (user_id, name, score, answered, updated) "
+                    "VALUES (?, ?, ?, 1, ?)",
+                    (user_id, name, new, now),
+                )
+            elif old != new:
+                conn.execute(
+                    "UPDATE scores SET name = ?, score = ?, "
+                    "answered = answered + 1, updated = ? WHERE user_id = ?",
+                    (name, new, now, user_id),
+                )
+            else:
+                # No points: keep `updated` so a wrong answer doesn't drop
+                # the user behind everyone they're tied with.
+                conn.execute(
+                    "UPDATE scores SET name = ?, answered = answered + 1 "
+                    "WHERE user_id = ?",
+                    (name, user_id),
+                )
+
+            if old != new:
+                if old is not None:
+                    conn.execute(
+                        "UPDATE score_counts SET n = n - 1 WHERE score = ?", (old,)
+                    )
+                    conn.execute(
+                        "DELETE FROM score_counts WHERE score = ? AND n <= 0", (old,)
+                    )
+                conn.execute(
+                    "INSERT INTO score_counts (score, n) VALUES (?, 1) "
+                    "ON CONFLICT(score) DO UPDATE SET n = n + 1",
+                    (new,),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return new
+
+    # ---------- reads ----------
+    def top(self, k=10):
+        """Return the top-k rows as dicts (rank, user_id, name, score, answered).
+
+        Ranks follow the same rule as rank(): tied scores share a rank.
+        """
+        rows = self._conn().execute(
+            "SELECT user_id, name, score, answered FROM scores "
+            "ORDER BY score DESC, updated ASC LIMIT ?",
+            (k,),
+        ).fetchall()
+        out = []
+        for i, (u, n, s, a) in enumerate(rows):
+            # Every higher score is already in the list, so the first row
+            # at this score sits at position (rank - 1).
+            rank = out[-1]["rank"] if out and out[-1]["score"] == s else i + 1
+            out.append(
+                {"rank": rank, "user_id": u, "name": n, "score": s, "answered": a}
+            )
+        return out
+
+    def rank(self, user_id):
+        """Return (rank, score) for a user, or None if they have no entry."""
+        conn = self._conn()
+        # Both reads in one (deferred) transaction so they see the same
+        # WAL snapshot; otherwise a record() in between can shift the rank.
+        conn.execute("BEGIN")
+        try:
+            row = conn.execute(
+                "SELECT score FROM scores WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            score = row[0]
+            above = conn.execute(
+                "SELECT COALESCE(SUM(n), 0) FROM score_counts WHERE score > ?",
+                (score,),
+            ).fetchone()[0]
+        finally:
+            conn.execute("COMMIT")
+        return above + 1, score
+
+    def size(self):
+        """Number of users on the board."""
+        return self._conn().execute(
+            "SELECT COALESCE(SUM(n), 0) FROM score_counts"
+        ).fetchone()[0]
+
+
+# =====================================================
+# Load test: python src/leaderboard.py [submitters] [answers_each]
+# =====================================================
+def run_load_test(submitters=300, answers_each=20, path=None):
+    """
+    Start `submitters` threads that all answer at once and check the
+    board afterwards. Returns a dict with throughput and latency numbers.
+    """
+    import random
+    import tempfile
+
+    tmpdir = None
+    if path is None:
+        tmpdir = tempfile.mkdtemp(prefix="leaderboard_")
+        path = os.path.join(tmpdir, "leaderboard.db")
+
+    board = Leaderboard(path)
+    expected = {}
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(submitters)
+
+    def submitter(i):
+        user_id = f"user{i}@msstate.edu"
+        rng = random.Random(i)
+        local_total = 0
+        local_lat = []
+        try:
+            start_gate.wait()
+            for _ in range(answers_each):
+                points = 10 if rng.random() < 0.6 else 0
+                t0 = time.perf_counter()
+                board.record(user_id, f"User {i}", points)
+                local_lat.append(time.perf_counter() - t0)
+                local_total += points
+                board.rank(user_id)
+        except Exception as e:
+            with lock:
+                errors.append(repr(e))
+        finally:
+            board.close()
+        with lock:
+            expected[user_id] = local_total
+            latencies.extend(local_lat)
+
+    threads = [threading.Thread(target=submitter, args=(i,)) for i in range(submitters)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    # Check every total and every rank against a brute-force recomputation.
+    mismatches = 0
+    ordered = sorted(expected.values(), reverse=True)
+    for user_id, total in expected.items():
+        got = board.rank(user_id)
+        want_rank = 1 + sum(1 for s in ordered if s > total)
+        if got != (want_rank, total):
+            mismatches += 1
+    # The table and the "your rank" line must agree.
+    top = board.top(50)
+    for row in top:
+        if board.rank(row["user_id"]) != (row["rank"], row["score"]):
+            mismatches += 1
+    board.close()
+
+    latencies.sort()
+    n = len(latencies)
+    result = {
+        "submitters": submitters,
+        "updates": n,
+        "wall_seconds": wall,
+        "updates_per_second": n / wall if wall else 0.0,
+        "p50_ms": latencies[n // 2] * 1000 if n else 0.0,
+        "p99_ms": latencies[min(n - 1, int(n * 0.99))] * 1000 if n else 0.0,
+        "errors": errors,
+        "mismatches": mismatches,
+        "top_score": top[0]["score"] if top else 0,
+    }
+
+    if tmpdir is not None:
+        import shutil
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+
+    submitters = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    answers_each = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    r = run_load_test(submitters, answers_each)
+    print(f"{r['submitters']} concurrent submitters, {r['updates']} updates")
+    print(f"  wall time:   {r['wall_seconds']:.2f}s "
+          f"({r['updates_per_second']:.0f} updates/s)")
+    print(f"  latency:     p50 {r['p50_ms']:.2f} ms, p99 {r['p99_ms']:.2f} ms")
+    print(f"  errors:      {len(r['errors'])}")
+    print(f"  rank errors: {r['mismatches']}")
+    print(f"  top score:   {r['top_score']}")
+    sys.exit(1 if r["errors"] or r["mismatches"] else 0)
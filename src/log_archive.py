@@ -0,0 +1,373 @@
+# src/log_archive.py
+
+import glob
+import os
+import time
+import uuid
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+
+# Columns with few distinct values; stored as categoricals so Parquet
+# writes them dictionary-encoded.
+DICTIONARY_COLUMNS = [
+    "name", "email", "qtype", "difficulty", "learning_style_quiz", "source",
+]
+
+# Identifies one logged answer: the session file it came from (named by
+# user + session start) and its position in that append-only log.
+EVENT_KEY = ["source", "row"]
+
+# Partition for rows whose subject is empty; they must still be archived
+# before their source file is removed.
+MISSING_SUBJECT = "__missing__"
+
+
+# =====================================================
+# Partition paths: <archive>/date=YYYY-MM-DD/subject=<subject>/
+# =====================================================
+def _partition_dir(archive_dir, date, subject):
+    return os.path.join(
+        archive_dir, f"date={date}", f"subject={quote(str(subject), safe='')}"
+    )
+
+
+def _list_partitions(archive_dir):
+    """Yield (date, subject, folder) for every partition in the archive."""
+    for date_dir in sorted(glob.glob(os.path.join(archive_dir, "date=*"))):
+        date = os.path.basename(date_dir).split("=", 1)[1]
+        for subj_dir in sorted(glob.glob(os.path.join(date_dir, "subject=*"))):
+            subject = unquote(os.path.basename(subj_dir).split("=", 1)[1])
+            yield date, subject, subj_dir
+
+
+# =====================================================
+# Compaction: many small CSVs -> one Parquet file per partition
+# =====================================================
+def _read_session_csv(path):
+    """Read one session CSV, tagging rows with their event key and a timestamp."""
+    # keep_default_na=False: subjects such as "NA", "None" or "null" come
+    # from uploaded JSON and must stay strings, not turn into NaN.
+    df = pd.read_csv(path, keep_default_na=False)
+    for col in ("response_time", "timestamp"):
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    if "subject" in df.columns:
+        df["subject"] = df["subject"].replace("", MISSING_SUBJECT)
+    else:
+        df["subject"] = MISSING_SUBJECT
+    df["source"] = os.path.basename(path)
+    df["row"] = range(len(df))
+    if "timestamp" not in df.columns:
+        # Logs written before timestamps were added: fall back to the
+        # time the file was saved.
+        df["timestamp"] = os.path.getmtime(path)
+    df["timestamp"] = df["timestamp"].fillna(os.path.getmtime(path))
+    return df
+
+
+def _write_partition(df, folder):
+    """Write a partition as a single Parquet file, replacing what was there."""
+    os.makedirs(folder, exist_ok=True)
+    old_files = glob.glob(os.path.join(folder, "*.parquet"))
+
+    df = df.sort_values("timestamp").reset_index(drop=True)
+    for col in DICTIONARY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
+    tmp = os.path.join(folder, f".part-{uuid.uuid4().hex}.parquet.tmp")
+    final = os.path.join(folder, f"part-{uuid.uuid4().hex}.parquet")
+    df.to_parquet(tmp, index=False, compression="zstd")
+    os.replace(tmp, final)
+    for path in old_files:
+        os.remove(path)
+    return final
+
+
+def compact_user_logs(log_dir="data/user_logs", archive_dir="data/archive",
+                      keep_sources=False):
+    """
+    Merge every session CSV in `log_dir` into the partitioned archive.
+
+    Rows are split by event date (UTC) and subject. Each touched partition
+    is rewritten as one Parquet file that also holds its earlier rows, so
+    the archive stays at one file per partition however often this runs.
+    Rows already in the archive (same EVENT_KEY) are skipped, so running
+    it twice, or re-saving a session that was already compacted, adds
+    nothing twice. Rows with an empty subject go to subject=__missing__.
+
+    Unreadable or empty CSVs are skipped and left on disk. A source CSV is
+    deleted (unless keep_sources=True) only when every row read from it is
+    in the archive and the file hasn't changed since it was read.
+
+    Returns a dict with the number of files read, new rows archived,
+    partitions rewritten, and the list of skipped files.
+    """
+    sources = sorted(glob.glob(os.path.join(log_dir, "*.csv")))
+    frames = []
+    read = {}       # path -> (row count, mtime, size) at read time
+    skipped = []
+    for path in sources:
+        st = os.stat(path)
+        try:
+            df = _read_session_csv(path)
+        except (pd.errors.EmptyDataError, pd.errors.ParserError,
+                UnicodeDecodeError, OSError) as e:
+            skipped.append((path, str(e)))
+            continue
+        frames.append(df)
+        read[path] = (len(df), st.st_mtime_ns, st.st_size)
+
+    if not frames:
+        return {"files": 0, "rows": 0, "partitions": 0, "skipped": skipped}
+
+    new_rows = pd.concat(frames, ignore_index=True)
+    new_rows["date"] = pd.to_datetime(new_rows["timestamp"], unit="s").dt.strftime(
+        "%Y-%m-%d"
+    )
+
+    partitions = 0
+    added = 0
+    archived = {}   # source name -> rows confirmed in the archive
+    for (date, subject), group in new_rows.groupby(
+        ["date", "subject"], sort=True, dropna=False
+    ):
+        folder = _partition_dir(archive_dir, date, subject)
+        part = group.drop(columns=["date", "subject"])
+        existing = glob.glob(os.path.join(folder, "*.parquet"))
+        old_count = 0
+        if existing:
+            old = pd.concat([pd.read_parquet(p) for p in existing], ignore_index=True)
+            old_count = len(old)
+            part = pd.concat(
+                [old.astype(object), part.astype(object)], ignore_index=True
+            ).infer_objects()
+        part = part.drop_duplicates(subset=EVENT_KEY, keep="first")
+        if len(part) > old_count:
+            _write_partition(part, folder)
+            added += len(part) - old_count
+            partitions += 1
+
+        # Every row of this group is now in the partition, either just
+        # written or already there under the same key.
+        in_part = set(zip(part["source"], part["row"]))
+        for source, row in zip(group["source"], group["row"]):
+            if (source, row) in in_part:
+                archived[source] = archived.get(source, 0) + 1
+
+    total_archived = sum(archived.values())
+    if total_archived != len(new_rows):
+        raise RuntimeError(
+            f"Archived {total_archived} of {len(new_rows)} rows read; "
+            "source CSVs were left in place."
+        )
+
+    if not keep_sources:
+        for path, (rows, mtime, size) in read.items():
+            if archived.get(os.path.basename(path), 0) != rows:
+                continue
+            st = os.stat(path)
+            # A save that replaced the file after we read it may hold
+            # newer rows; leave it for the next run.
+            if (st.st_mtime_ns, st.st_size) != (mtime, size):
+                continue
+            os.remove(path)
+
+    return {
+        "files": len(read),
+        "rows": added,
+        "partitions": partitions,
+        "skipped": skipped,
+    }
+
+
+# =====================================================
+# Reader with partition pruning + column projection
+# =====================================================
+def read_archive(archive_dir="data/archive", columns=None, subjects=None,
+                 start_date=None, end_date=None):
+    """
+    Load rows from the archive.
+
+    subjects:   only open partitions for these subjects
+    start_date / end_date: inclusive 'YYYY-MM-DD' bounds on the date partition
+    columns:    only decode these columns ('date' and 'subject' come from
+                the folder names and are added when requested)
+
+    Partitions that don't match are skipped by folder name, so their
+    files are never opened.
+    """
+    if subjects is not None:
+        subjects = set(subjects)
+    want_date = columns is None or "date" in columns
+    want_subject = columns is None or "subject" in columns
+    file_columns = None
+    if columns is not None:
+        file_columns = [c for c in columns if c not in ("date", "subject")]
+
+    frames = []
+    for date, subject, folder in _list_partitions(archive_dir):
+        if subjects is not None and subject not in subjects:
+            continue
+        if start_date is not None and date < start_date:
+            continue
+        if end_date is not None and date > end_date:
+            continue
+        for path in sorted(glob.glob(os.path.join(folder, "*.parquet"))):
+            df = pd.read_parquet(path, columns=file_columns)
+            if want_date:
+                df["date"] = date
+            if want_subject:
+                df["subject"] = subject
+            frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=columns or [])
+    out = pd.concat(frames, ignore_index=True)
+    if columns is not None:
+        out = out[list(columns)]
+    return out
+
+
+# =====================================================
+# Benchmark: python src/log_archive.py --benchmark [users] [sessions] [answers]
+# =====================================================
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            total += os.path.getsize(os.path.join(root, f))
+    return total
+
+
+def run_benchmark(users=500, sessions_each=4, answers_each=25, days=14, seed=0):
+    """
+    Build a synthetic data/user_logs tree, compact it, and compare on-disk
+    size and the time to answer "math accuracy over the last 3 days" from
+    the raw CSVs versus the archive.
+    """
+    import random
+    import shutil
+    import tempfile
+
+    rng = random.Random(seed)
+    root = tempfile.mkdtemp(prefix="log_archive_")
+    log_dir = os.path.join(root, "user_logs")
+    archive_dir = os.path.join(root, "archive")
+    os.makedirs(log_dir)
+
+    subjects = ["math", "linux", "cyber"]
+    qtypes = ["recall", "mcq", "problem"]
+    levels = ["easy", "medium", "hard"]
+    styles = ["visual", "analytical", "practical"]
+    day0 = time.time() - days * 86400
+
+    for u in range(users):
+        name = f"Student {u}"
+        email = f"student{u}@msstate.edu"
+        style = rng.choice(styles)
+        for s in range(sessions_each):
+            t = day0 + rng.random() * days * 86400
+            rows = []
+            for _ in range(answers_each):
+                t += rng.uniform(2, 40)
+                rows.append({
+                    "name": name,
+                    "email": email,
+                    "subject": rng.choice(subjects),
+                    "qtype": rng.choice(qtypes),
+                    "difficulty": rng.choice(levels),
+                    "correct": rng.random() < 0.6,
+                    "response_time": rng.uniform(1, 30),
+                    "learning_style_quiz": style,
+                    "timestamp": t,
+                })
+            pd.DataFrame(rows).to_csv(
+                os.path.join(log_dir, f"student{u}_{s}_session.csv"), index=False
+            )
+
+    csv_files = len(os.listdir(log_dir))
+    csv_bytes = _dir_size(log_dir)
+    since = time.strftime("%Y-%m-%d", time.gmtime(time.time() - 3 * 86400))
+
+    def scan_csv():
+        df = pd.concat(
+            [pd.read_csv(p) for p in glob.glob(os.path.join(log_dir, "*.csv"))],
+            ignore_index=True,
+        )
+        dates = pd.to_datetime(df["timestamp"], unit="s").dt.strftime("%Y-%m-%d")
+        df = df[(df["subject"] == "math") & (dates >= since)]
+        return df["correct"].mean()
+
+    def scan_archive():
+        df = read_archive(
+            archive_dir, columns=["correct"], subjects=["math"], start_date=since
+        )
+        return df["correct"].mean()
+
+    t0 = time.perf_counter()
+    csv_answer = scan_csv()
+    csv_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    stats = compact_user_logs(log_dir, archive_dir, keep_sources=True)
+    compact_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    archive_answer = scan_archive()
+    archive_seconds = time.perf_counter() - t0
+
+    archive_files = sum(
+        len(glob.glob(os.path.join(folder, "*.parquet")))
+        for _, _, folder in _list_partitions(archive_dir)
+    )
+    result = {
+        "rows": stats["rows"],
+        "csv_files": csv_files,
+        "csv_bytes": csv_bytes,
+        "archive_files": archive_files,
+        "archive_bytes": _dir_size(archive_dir),
+        "compact_seconds": compact_seconds,
+        "csv_scan_seconds": csv_seconds,
+        "archive_scan_seconds": archive_seconds,
+        "same_answer": abs(csv_answer - archive_answer) < 1e-12,
+    }
+    shutil.rmtree(root, ignore_errors=True)
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Compact data/user_logs into the partitioned Parquet archive."
+    )
+    parser.add_argument("--log-dir", default="data/user_logs")
+    parser.add_argument("--archive-dir", default="data/archive")
+    parser.add_argument("--keep-sources", action="store_true",
+                        help="leave the session CSVs in place after compaction")
+    parser.add_argument("--benchmark", nargs="*", type=int, metavar="N",
+                        help="run the synthetic size/scan benchmark instead "
+                             "(users, sessions_each, answers_each)")
+    args = parser.parse_args()
+
+    if args.benchmark is None:
+        stats = compact_user_logs(args.log_dir, args.archive_dir, args.keep_sources)
+        print(f"Compacted {stats['files']} session files: {stats['rows']} new rows "
+              f"into {stats['partitions']} partitions of {args.archive_dir}")
+        for path, reason in stats["skipped"]:
+            print(f"  skipped {path}: {reason}")
+    else:
+        r = run_benchmark(*args.benchmark[:3])
+        print(f"{r['rows']} logged answers")
+        print(f"  CSV layout:     {r['csv_files']:>6} files  "
+              f"{r['csv_bytes'] / 1024:>9.1f} KiB")
+        print(f"  Parquet layout: {r['archive_files']:>6} files  "
+              f"{r['archive_bytes'] / 1024:>9.1f} KiB  "
+              f"(compaction took {r['compact_seconds']:.2f}s)")
+        print("  'math accuracy, last 3 days':")
+        print(f"    scan every CSV:          {r['csv_scan_seconds'] * 1000:8.1f} ms")
+        print(f"    pruned archive read:     {r['archive_scan_seconds'] * 1000:8.1f} ms")
+        print(f"  same answer: {r['same_answer']}")
@@ -0,0 +1,209 @@
+# src/prefetch.py
+
+import os
+import random
+from collections import deque
+
+
+# =====================================================
+# Candidate pools (same rules the game has always used)
+# =====================================================
+def preferred_difficulties(difficulty_choice, last_correct):
+    """Which difficulty levels to draw from next."""
+    if difficulty_choice != "mixed":
+        return (difficulty_choice,)
+    if last_correct is True:
+        return ("medium", "hard")
+    if last_correct is False:
+        return ("easy",)
+    return ("easy", "medium")
+
+
+def candidate_pool(questions, difficulty_choice, last_correct):
+    """Questions at the preferred difficulty, or the whole bank if none match."""
+    preferred = preferred_difficulties(difficulty_choice, last_correct)
+    return [q for q in questions if q.difficulty in preferred] or list(questions)
+
+
+# =====================================================
+# Per-session prefetch buffer
+# =====================================================
+class QuestionPrefetcher:
+    """
+    Keeps the next few questions ready for every outcome of the current one.
+
+    Candidate pools are built once per (difficulty setting, last answer)
+    and only rebuilt when the question bank changes. For each pool a small
+    buffer of random picks is kept filled, so after Submit the next
+    question is a pop from a deque instead of a scan over the bank.
+    """
+
+    def __init__(self, depth=3, rng=None):
+        self.depth = depth
+        self.rng = rng or random.Random()
+        self._bank_key = None
+        self._pools = {}      # (difficulty_choice, last_correct) -> [Question]
+        self._buffers = {}    # same key -> deque of upcoming picks
+        self._varied = {}     # same key -> pool has more than one prompt
+
+    def _sync_bank(self, questions):
+        # Custom questions are appended to the bank in place, so the
+        # length (plus identity) is enough to notice a change.
+        key = (id(questions), len(questions))
+        if key != self._bank_key:
+            self._bank_key = key
+            self._pools.clear()
+            self._buffers.clear()
+            self._varied.clear()
+
+    def _pool(self, questions, difficulty_choice, last_correct):
+        key = (difficulty_choice, last_correct)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = candidate_pool(questions, difficulty_choice, last_correct)
+            self._pools[key] = pool
+            self._varied[key] = len({q.prompt for q in pool}) > 1
+        return pool
+
+    def _fill(self, questions, difficulty_choice, last_correct):
+        key = (difficulty_choice, last_correct)
+        pool = self._pool(questions, difficulty_choice, last_correct)
+        buf = self._buffers.setdefault(key, deque())
+        while len(buf) < self.depth:
+            buf.append(self.rng.choice(pool))
+        return buf
+
+    def prefetch(self, questions, difficulty_choice):
+        """Fill buffers for both possible outcomes (right / wrong) of the next answer."""
+        if not questions:
+            return
+        self._sync_bank(questions)
+        for outcome in (True, False):
+            self._fill(questions, difficulty_choice, outcome)
+
+    def next(self, questions, difficulty_choice, last_correct, last_question):
+        """Pop the next question, avoiding the same prompt back-to-back."""
+        if not questions:
+            return None
+        self._sync_bank(questions)
+        buf = self._fill(questions, difficulty_choice, last_correct)
+
+        # Only repeat a prompt if the pool has nothing else to offer.
+        if last_question is not None and self._varied[(difficulty_choice, last_correct)]:
+            while buf[0].prompt == last_question.prompt:
+                buf.popleft()
+                if not buf:
+                    buf = self._fill(questions, difficulty_choice, last_correct)
+        return buf.popleft()
+
+
+# =====================================================
+# Measurement: python src/prefetch.py [--app PATH ...] [--clicks N] [--runs N]
+# =====================================================
+def measure_pick(copies=20, n=20000):
+    """
+    Per-call cost (seconds) of picking the next question from a bank of
+    `copies` x the built-in questions: the old scan-and-filter pick versus
+    a pop from the prefetch buffer.
+    """
+    import timeit
+
+    from core import build_question_bank
+
+    bank = build_question_bank() * copies
+    last = bank[0]
+
+    def scan_pick():
+        candidates = candidate_pool(bank, "mixed", True)
+        non_repeat = [q for q in candidates if q.prompt != last.prompt]
+        return random.choice(non_repeat or candidates)
+
+    prefetcher = QuestionPrefetcher()
+
+    return {
+        "bank": len(bank),
+        "scan_seconds": timeit.timeit(scan_pick, number=n) / n,
+        "prefetch_seconds": timeit.timeit(
+            lambda: prefetcher.next(bank, "mixed", True, last), number=n
+        ) / n,
+    }
+
+
+def measure_clicks(app_path, clicks=100, warmup=5):
+    """
+    Drive `app_path` with streamlit's AppTest: start a session, finish the
+    style quiz, then time `clicks` Submit clicks (each one a full rerun).
+    Runs in a temp directory so the app's data/ files don't touch the repo.
+    Returns the sorted per-click latencies in seconds, warm-up clicks dropped.
+    """
+    import shutil
+    import tempfile
+    import time
+
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    # Cached resources (leaderboard, sketch store) would otherwise keep
+    # pointing at an earlier run's temp directory.
+    st.cache_resource.clear()
+    app_path = os.path.abspath(app_path)
+    workdir = tempfile.mkdtemp(prefix="prefetch_bench_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        at = AppTest.from_file(app_path, default_timeout=30)
+        at.run()
+        at.sidebar.text_input[0].input("Bench User")
+        at.sidebar.button[0].click().run()
+        [b for b in at.button if b.label.startswith("Finish")][0].click().run()
+        at.run()
+
+        latencies = []
+        for _ in range(clicks + warmup):
+            radios = [r for r in at.radio if r.label == "Choose your answer:"]
+            if radios:
+                radios[0].set_value(radios[0].options[0])
+            else:
+                [t for t in at.text_input if t.label == "Your answer:"][0].input("x")
+            submit = [b for b in at.button if b.label == "Submit"][0]
+            t0 = time.perf_counter()
+            submit.click().run()
+            latencies.append(time.perf_counter() - t0)
+            if at.exception:
+                raise RuntimeError(at.exception[0].value)
+        return sorted(latencies[warmup:])
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    import statistics
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(
+        description="Measure question-pick cost and per-click Submit latency."
+    )
+    parser.add_argument("--app", action="append",
+                        help="app file to drive (repeat to compare; runs alternate)")
+    parser.add_argument("--clicks", type=int, default=95)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    apps = args.app or [os.path.join(here, "..", "app.py")]
+
+    pick = measure_pick()
+    print(f"Next-question pick ({pick['bank']}-question bank):")
+    print(f"  scan + filter:  {pick['scan_seconds'] * 1e6:6.1f} us")
+    print(f"  prefetch pop:   {pick['prefetch_seconds'] * 1e6:6.1f} us")
+
+    medians = {app: [] for app in apps}
+    for _ in range(args.runs):
+        for app in apps:
+            lat = measure_clicks(app, args.clicks)
+            medians[app].append(statistics.median(lat))
+    print(f"Per-click Submit latency ({args.clicks} clicks x {args.runs} runs):")
+    for app, runs in medians.items():
+        ms = ", ".join(f"{m * 1000:.1f}" for m in runs)
+        print(f"  {app}: median per run {ms} ms "
+              f"(range {min(runs) * 1000:.0f}-{max(runs) * 1000:.0f} ms)")
@@ -0,0 +1,205 @@
+# src/sketches.py
+
+import json
+import math
+import os
+import threading
+
+
+# =====================================================
+# DDSketch – quantiles with bounded relative error
+# =====================================================
+class DDSketch:
+    """
+    Streaming quantile sketch (Masson et al., DDSketch).
+
+    Values are counted in log-spaced buckets, so any quantile comes back
+    within `relative_accuracy` of the true value (1% by default). At most
+    `max_buckets` buckets are kept – the lowest ones are folded together
+    if that limit is hit – so memory is fixed no matter how many values
+    are added. Two sketches with the same settings merge exactly.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048, min_value=1e-3):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {}          # bucket index -> count
+        self.zero_count = 0     # values below min_value
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index):
+        # Midpoint of bucket (gamma^(i-1), gamma^i] in relative terms.
+        return 2 * self.gamma ** index / (1 + self.gamma)
+
+    def _collapse(self):
+        """Fold the lowest buckets together until we're within max_buckets."""
+        if len(self.bins) <= self.max_buckets:
+            return
+        keys = sorted(self.bins)
+        extra = len(keys) - self.max_buckets
+        target = keys[extra]
+        for k in keys[:extra]:
+            self.bins[target] += self.bins.pop(k)
+
+    def add(self, value, weight=1):
+        if value < self.min_value:
+            self.zero_count += weight
+        else:
+            i = self._index(value)
+            self.bins[i] = self.bins.get(i, 0) + weight
+            self._collapse()
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        """Add every value counted in `other` into this sketch."""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy.")
+        for i, c in other.bins.items():
+            self.bins[i] = self.bins.get(i, 0) + c
+        self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1), or None if empty."""
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return self.min
+        for i in sorted(self.bins):
+            seen += self.bins[i]
+            if seen > rank:
+                return min(max(self._value(i), self.min), self.max)
+        return self.max
+
+    # ---------- persistence ----------
+    def to_dict(self):
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_buckets": self.max_buckets,
+            "min_value": self.min_value,
+            "bins": {str(i): c for i, c in self.bins.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        s = cls(data["relative_accuracy"], data["max_buckets"], data["min_value"])
+        s.bins = {int(i): c for i, c in data["bins"].items()}
+        s.zero_count = data["zero_count"]
+        s.count = data["count"]
+        if s.count:
+            s.min = data["min"]
+            s.max = data["max"]
+        return s
+
+
+# =====================================================
+# Response times per (subject, qtype, difficulty)
+# =====================================================
+class ResponseTimeSketches:
+    """One DDSketch per (subject, qtype, difficulty) bucket."""
+
+    def __init__(self):
+        self.sketches = {}
+
+    def add(self, subject, qtype, difficulty, seconds):
+        key = (subject, qtype, difficulty)
+        if key not in self.sketches:
+            self.sketches[key] = DDSketch()
+        self.sketches[key].add(seconds)
+
+    def merge(self, other):
+        for key, sketch in other.sketches.items():
+            if key not in self.sketches:
+                self.sketches[key] = DDSketch()
+            self.sketches[key].merge(sketch)
+
+    def summary(self, quantiles=(0.5, 0.9, 0.99)):
+        """Rows of {subject, qtype, difficulty, answers, p50, p90, p99} in seconds."""
+        rows = []
+        ordered = sorted(self.sketches.items(), key=lambda kv: tuple(map(str, kv[0])))
+        for (subject, qtype, difficulty), s in ordered:
+            row = {
+                "subject": subject,
+                "qtype": qtype,
+                "difficulty": difficulty,
+                "answers": s.count,
+            }
+            for q in quantiles:
+                row[f"p{round(q * 100)}"] = s.quantile(q)
+            rows.append(row)
+        return rows
+
+    def to_list(self):
+        # Keys are stored as JSON lists: subjects come from uploaded JSON,
+        # so they may contain any character (or not be strings at all).
+        return [
+            {"key": list(key), "sketch": s.to_dict()}
+            for key, s in self.sketches.items()
+        ]
+
+    @classmethod
+    def from_list(cls, data):
+        out = cls()
+        for item in data:
+            out.sketches[tuple(item["key"])] = DDSketch.from_dict(item["sketch"])
+        return out
+
+
+# =====================================================
+# Shared store – merged across sessions and users
+# =====================================================
+class SketchStore:
+    """
+    ResponseTimeSketches for all users, kept in a small JSON file.
+
+    Sessions merge their own sketches in when they save; the file size
+    depends on the number of buckets, not the number of answers.
+    """
+
+    def __init__(self, path="data/response_times.json"):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return ResponseTimeSketches()
+        with open(self.path, "r", encoding="utf-8") as f:
+            return ResponseTimeSketches.from_list(json.load(f))
+
+    def merge(self, sketches):
+        """Merge `sketches` into the stored totals and return the new totals."""
+        with self._lock:
+            total = self.load()
+            total.merge(sketches)
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(total.to_list(), f)
+            os.replace(tmp, self.path)
+            return total